@@ -0,0 +1,155 @@
+import hashlib
+import inspect
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import CodeType
+from typing import Any, List, Optional
+
+from pydantic import BaseModel
+from pydantic_ai import Agent
+from pydantic_ai.usage import Usage
+
+
+# Set LLM_CACHE=1 to reuse stored responses instead of calling the model on every run
+LLM_CACHE = os.getenv("LLM_CACHE", "0") == "1"
+LLM_CACHE_DIR = Path(os.getenv("LLM_CACHE_DIR", ".llm_cache"))
+# Bump when the key or payload format changes, to invalidate every stored response
+LLM_CACHE_VERSION = 2
+
+
+@dataclass
+class CachedRunResult:
+    """Stand-in for an agent run result when the output comes from the cache."""
+
+    output: Any
+    _usage: Usage = field(default_factory=Usage)
+
+    def usage(self) -> Usage:
+        return self._usage
+
+    def all_messages(self) -> List[Any]:
+        return []
+
+
+def _output_schema(output_type: Any) -> Any:
+    if isinstance(output_type, type) and issubclass(output_type, BaseModel):
+        return output_type.model_json_schema()
+    return getattr(output_type, "__name__", str(output_type))
+
+
+def _code_fingerprint(fn: Any) -> str:
+    """Hash a function's bytecode and constants, so editing its body changes the cache key.
+
+    Only the function itself is covered, not helpers it calls.
+    """
+    digest = hashlib.sha256()
+
+    def feed(code: CodeType) -> None:
+        digest.update(code.co_code)
+        digest.update(repr(code.co_names).encode())
+        for const in code.co_consts:
+            # Nested code objects (comprehensions, inner functions) repr with a memory address
+            if isinstance(const, CodeType):
+                feed(const)
+            elif isinstance(const, frozenset):  # Iteration order varies with hash randomization
+                digest.update(repr(sorted(map(repr, const))).encode())
+            else:
+                digest.update(repr(const).encode())
+
+    feed(inspect.unwrap(fn).__code__)
+    return f"{fn.__qualname__}:{digest.hexdigest()}"
+
+
+def _require(agent: Agent, attribute: str) -> Any:
+    # These are pydantic-ai internals; fail loudly rather than silently dropping them from the key
+    try:
+        return getattr(agent, attribute)
+    except AttributeError:
+        raise RuntimeError(
+            f"pydantic-ai Agent has no {attribute!r}; update utils/llm_cache.py for this "
+            "pydantic-ai version or run with LLM_CACHE=0"
+        ) from None
+
+
+def _prompt_functions(agent: Agent) -> List[str]:
+    return [_code_fingerprint(runner.function) for runner in _require(agent, "_system_prompt_functions")]
+
+
+def _tools(agent: Agent) -> List[str]:
+    tools = _require(agent, "_function_toolset").tools
+    return [_code_fingerprint(tools[name].function) for name in sorted(tools)]
+
+
+def cache_key(agent: Agent, user_prompt: str, deps: Any) -> str:
+    # Anything that changes what the model sees or what the output must look like is part of the
+    # key: static prompts, the code of dynamic prompt functions and tools, and the output schema
+    parts = [
+        LLM_CACHE_VERSION,
+        getattr(agent.model, "model_name", str(agent.model)),
+        list(_require(agent, "_system_prompts")),
+        _prompt_functions(agent),
+        _tools(agent),
+        user_prompt,
+        _output_schema(getattr(agent, "output_type", str)),
+        repr(deps),
+    ]
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+
+def parse_output(agent: Agent, payload: str):
+    """Rebuild a stored output, or return None if it no longer matches the output type."""
+    output_type = getattr(agent, "output_type", str)
+    try:
+        if isinstance(output_type, type) and issubclass(output_type, BaseModel):
+            return CachedRunResult(output_type.model_validate_json(payload))
+        return CachedRunResult(json.loads(payload))
+    except ValueError:  # Includes pydantic's ValidationError
+        return None
+
+
+def load_output(agent: Agent, cache_path: Path):
+    """Rebuild a stored agent output, or return None when nothing usable is cached."""
+    if not cache_path.exists():
+        return None
+    return parse_output(agent, cache_path.read_text(encoding="utf-8"))
+
+
+def store_output(cache_path: Path, output: Any) -> None:
+    if isinstance(output, BaseModel):
+        payload = output.model_dump_json()
+    else:
+        payload = json.dumps(output)
+    LLM_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    cache_path.write_text(payload, encoding="utf-8")
+
+
+def cached_run_sync(agent: Agent, user_prompt: str, deps: Any = None):
+    """Run an agent synchronously, reusing a stored response for an identical request."""
+    if not LLM_CACHE:
+        return agent.run_sync(user_prompt, deps=deps)
+
+    cache_path = LLM_CACHE_DIR / f"{cache_key(agent, user_prompt, deps)}.json"
+    cached = load_output(agent, cache_path)
+    if cached is not None:
+        return cached
+
+    response = agent.run_sync(user_prompt, deps=deps)
+    store_output(cache_path, response.output)
+    return response
+
+
+async def cached_run(agent: Agent, user_prompt: str, deps: Any = None, usage: Optional[Usage] = None):
+    """Async counterpart of cached_run_sync for use inside pipelines."""
+    if not LLM_CACHE:
+        return await agent.run(user_prompt, deps=deps, usage=usage)
+
+    cache_path = LLM_CACHE_DIR / f"{cache_key(agent, user_prompt, deps)}.json"
+    cached = load_output(agent, cache_path)
+    if cached is not None:
+        return cached
+
+    response = await agent.run(user_prompt, deps=deps, usage=usage)
+    store_output(cache_path, response.output)
+    return response
@@ -0,0 +1,115 @@
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel
+from pydantic_ai import Agent
+
+from utils.llm_cache import LLM_CACHE, LLM_CACHE_DIR, cache_key, cached_run_sync, parse_output
+
+
+SEMANTIC_CACHE_MODEL = "all-MiniLM-L6-v2"  # 384-dim sentence embeddings
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+
+_encoder = None
+_indexes: Dict[str, Dict[str, Any]] = {}
+
+
+@lru_cache(maxsize=1)
+def _semantic_deps() -> Optional[SimpleNamespace]:
+    """Import the optional dependencies on first use, or return None if they aren't installed.
+
+    faiss and sentence-transformers (which pulls in torch) are slow to import, so this only
+    happens once the cache is actually enabled; without them we fall back to the exact cache.
+    """
+    try:
+        import faiss
+        import numpy as np
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        return None
+    return SimpleNamespace(faiss=faiss, np=np, SentenceTransformer=SentenceTransformer)
+
+
+def _embed(text: str):
+    global _encoder
+    deps = _semantic_deps()
+    if _encoder is None:
+        _encoder = deps.SentenceTransformer(SEMANTIC_CACHE_MODEL)
+    embedding = _encoder.encode([text], normalize_embeddings=True)
+    return deps.np.asarray(embedding, dtype="float32")
+
+
+def _index_path(key: str) -> Path:
+    # The encoder name is part of the file name: embeddings from a different model (or dimension)
+    # must never be searched with the current one
+    encoder = SEMANTIC_CACHE_MODEL.replace("/", "_")
+    return LLM_CACHE_DIR / f"semantic_{encoder}_{key}.json"
+
+
+def _load_index(key: str) -> Dict[str, Any]:
+    """Load (or create) the embedding index for one agent/deps combination."""
+    if key in _indexes:
+        return _indexes[key]
+
+    entry = {"index": None, "embeddings": [], "outputs": []}
+    path = _index_path(key)
+    if path.exists():
+        # A corrupt or truncated index file is treated like a missing one and rebuilt
+        try:
+            stored = json.loads(path.read_text(encoding="utf-8"))
+            embeddings, outputs = list(stored["embeddings"]), list(stored["outputs"])
+            if len(embeddings) != len(outputs):
+                raise ValueError("embeddings and outputs are out of sync")
+            entry["embeddings"], entry["outputs"] = embeddings, outputs
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+    if entry["embeddings"]:
+        deps = _semantic_deps()
+        entry["index"] = deps.faiss.IndexFlatIP(len(entry["embeddings"][0]))
+        entry["index"].add(deps.np.asarray(entry["embeddings"], dtype="float32"))
+    _indexes[key] = entry
+    return entry
+
+
+def _save_index(key: str, entry: Dict[str, Any]) -> None:
+    LLM_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = _index_path(key)
+    stored = {"embeddings": entry["embeddings"], "outputs": entry["outputs"]}
+    path.write_text(json.dumps(stored), encoding="utf-8")
+
+
+def semantic_run_sync(agent: Agent, user_prompt: str, deps: Any = None):
+    """Run an agent synchronously, reusing a stored response for a paraphrased request."""
+    if not LLM_CACHE or _semantic_deps() is None:
+        return cached_run_sync(agent, user_prompt, deps=deps)
+
+    # Everything except the user prompt must match exactly for a semantic hit
+    key = cache_key(agent, "", deps)
+    entry = _load_index(key)
+    embedding = _embed(user_prompt)
+
+    if entry["index"] is not None:
+        scores, ids = entry["index"].search(embedding, 1)
+        if scores[0][0] >= SEMANTIC_CACHE_THRESHOLD:
+            # A payload that no longer matches the output type counts as a miss
+            cached = parse_output(agent, entry["outputs"][ids[0][0]])
+            if cached is not None:
+                return cached
+
+    response = cached_run_sync(agent, user_prompt, deps=deps)
+    if isinstance(response.output, BaseModel):
+        payload = response.output.model_dump_json()
+    else:
+        payload = json.dumps(response.output)
+
+    if entry["index"] is None:
+        entry["index"] = _semantic_deps().faiss.IndexFlatIP(embedding.shape[1])
+    entry["index"].add(embedding)
+    entry["embeddings"].append(embedding[0].tolist())
+    entry["outputs"].append(payload)
+    _save_index(key, entry)
+    return response